@@ -1,17 +1,30 @@
-from typing import List, Any, Dict, Optional
+from typing import List, Any, BinaryIO, Callable, Dict, Iterable, Iterator, Optional
+import asyncio
+import functools
+import glob
+import io
 import json
+import logging
+import marshal
 import os
 import random
+import re
+import shutil
 import sys
 import string
-import traceback
+import tempfile
+import threading
 import time
+from concurrent.futures import CancelledError, Future
+from logging.handlers import RotatingFileHandler
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import date, datetime
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import HumanMessage, AIMessage, BaseMessage
-from langchain_core.tools import tool
+from langchain_core.messages import HumanMessage, AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.tools import StructuredTool, tool
 from langchain.agents import create_agent
+from pydantic import PrivateAttr
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_exponential_jitter
 from dotenv import load_dotenv
 import tkinter as tk
 from tkinter import scrolledtext
@@ -29,12 +42,145 @@ except ImportError:
         BRIGHT = RESET_ALL = ""
     print("(Optional) Tip: run 'pip install colorama' for colored output.")
 
+try:
+    import orjson
+except ImportError:
+    # fallback to the stdlib json module if orjson isn't installed
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:
+    # fallback to the stdlib random module if numpy isn't installed
+    np = None
+
+try:
+    from google.api_core import exceptions as google_exceptions
+except ImportError:
+    # fallback to retrying only network errors if google-api-core isn't installed
+    google_exceptions = None
+
+# Errors worth retrying: rate limits, overloaded or unreachable servers, timeouts
+TRANSIENT_ERRORS = (ConnectionError, TimeoutError)
+if google_exceptions is not None:
+    TRANSIENT_ERRORS += (
+        google_exceptions.TooManyRequests,
+        google_exceptions.ResourceExhausted,
+        google_exceptions.InternalServerError,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.DeadlineExceeded,
+    )
+
 load_dotenv()  # Load environment variables from .env file
 
+# Runtime logging goes to a rotating file instead of stdout, so the GUI and the agent's
+# event-loop thread never contend for the stdout lock, and levels can be filtered
+logger = logging.getLogger("yemuelgen")
+log_level_name = os.getenv("YEMUEL_LOG_LEVEL", "INFO")
+log_level = logging.getLevelNamesMapping().get(log_level_name.upper())
+logger.setLevel(log_level if log_level is not None else logging.INFO)
+if not logger.handlers:
+    log_handler = RotatingFileHandler(
+        os.getenv("YEMUEL_LOG_FILE", "yemuelgen.log"),
+        maxBytes=1024 * 1024,
+        backupCount=3,
+        encoding="utf-8",
+        delay=True,
+    )
+    log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(threadName)s] %(name)s: %(message)s"))
+    logger.addHandler(log_handler)
+if log_level is None:
+    logger.warning("Ignoring YEMUEL_LOG_LEVEL=%r (unknown level); using INFO", log_level_name)
+
+
+def env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment, falling back to `default` if it isn't one."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning("Ignoring %s=%r (not an integer); using %d", name, value, default)
+        return default
+
+
+WRITE_BUFFER_SIZE = 128 * 1024  # bytes buffered per write() syscall in write_json
+UMASK = os.umask(0)  # read once at import (os.umask can only be read by setting it)
+os.umask(UMASK)
+NEW_FILE_MODE = 0o666 & ~UMASK  # mode for files written by write_json, as a plain open() would give
+READ_CACHE_MAX_BYTES = 4 * 1024 * 1024  # JSON files up to this size are cached by read_json
+MAX_BACKUPS = env_int("YEMUEL_MAX_BACKUPS", 3)  # backups kept per file by write_json
+MAX_OUTPUT_LINES = 5000  # lines kept in the GUI output box; older lines are trimmed
+TRIM_CHUNK_LINES = 1000  # extra lines dropped per trim, so trimming doesn't run on every flush
+STREAM_FLUSH_MS = 33  # streamed tokens are batched into one GUI insert at most every ~30 Hz
+
 # openai_key = os.getenv("OPENAI_API_KEY")
 
+def replace_file(path: Path, write_body: Callable[[BinaryIO], None], backup: bool) -> int:
+    """
+    Atomically (re)write a file: `write_body` fills a buffered temp file, the old file is
+    optionally backed up (only the newest MAX_BACKUPS are kept), and the temp file is
+    swapped into place.
+
+    Returns:
+        int: Number of bytes written.
+    """
+    # Ensure directory exists (idempotent, so no separate exists() check)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Write to a uniquely named temp file first, so the original is untouched if serialization
+    # fails and concurrent writes to the same path never share a temp file
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    tmp_path = Path(tmp_name)
+    try:
+        with os.fdopen(fd, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+            write_body(f)
+            bytes_written = f.tell()
+        os.chmod(tmp_path, NEW_FILE_MODE)  # mkstemp creates files as 0600 (os.chmod also works on Windows)
+
+        # Backup existing file
+        if backup and MAX_BACKUPS > 0:
+            backup_file(path)
+
+        # Atomically swap the new file into place
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    return bytes_written
+
+
+def backup_file(path: Path) -> None:
+    """
+    Keep the current version of `path` as a timestamped backup and prune all but the newest
+    MAX_BACKUPS. The backup is a hardlink (O(1), no data copied), which also leaves `path`
+    in place until the caller swaps the new version in.
+    """
+    backup_path = path.with_name(f"{path.stem}_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}{path.suffix}")
+    backup_path.unlink(missing_ok=True)  # same-second rewrite: keep the latest previous version
+    try:
+        os.link(path, backup_path)
+    except FileNotFoundError:
+        return  # nothing to back up yet
+    except FileExistsError:
+        pass  # a concurrent write just backed up this version under the same name
+    except OSError:
+        shutil.copy2(path, backup_path)  # filesystem without hardlink support
+
+    # Only names in backup_file's exact timestamp format count; other user files are left alone.
+    # Timestamps sort lexicographically, so the oldest backups come first.
+    backup_name = re.compile(rf"{re.escape(path.stem)}_backup_\d{{8}}_\d{{6}}{re.escape(path.suffix)}")
+    backups = sorted(
+        p for p in path.parent.glob(f"{glob.escape(path.stem)}_backup_*{glob.escape(path.suffix)}")
+        if backup_name.fullmatch(p.name)
+    )
+    for old_backup in backups[:-MAX_BACKUPS]:
+        old_backup.unlink(missing_ok=True)
+
+
 #Tools definitions
-@tool
 def write_json(filepath: str, data: List[Dict[str, Any]], backup: bool = True) -> dict:
     """
     Write a Python dictionary or list as JSON to a file with pretty formatting.
@@ -42,8 +188,8 @@ def write_json(filepath: str, data: List[Dict[str, Any]], backup: bool = True) -
 
     Args:
         filepath (str): Path to the output JSON file.
-        data (dict | list): Data to be serialized.
-        backup (bool): If True, creates a timestamped backup before overwriting.
+        data (dict | list): Data to be serialized. NaN and Infinity have no JSON form; they are written as null when orjson is installed.
+        backup (bool): If True, keeps a timestamped backup of the old file (up to YEMUEL_MAX_BACKUPS, default 3, are retained).
 
     Returns:
         dict: { "success": bool, "message": str, "path": str, "bytes_written": int }
@@ -51,29 +197,31 @@ def write_json(filepath: str, data: List[Dict[str, Any]], backup: bool = True) -
     try:
         path = Path(filepath)
 
-        # Ensure directory exists
-        if not path.parent.exists():
-            path.parent.mkdir(parents=True, exist_ok=True)
-
-        # Backup existing file
-        if backup and path.exists():
-            backup_path = path.with_name(f"{path.stem}_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}{path.suffix}")
-            os.rename(path, backup_path)
-
         # Validate data type
         if not isinstance(data, (dict, list)):
             raise TypeError("Data must be a dictionary or a list.")
 
-        # Write data
-        json_str = json.dumps(data, indent=4, ensure_ascii=False)
-        with path.open('w', encoding="utf-8") as f:
-            f.write(json_str)
+        def write_body(f: BinaryIO) -> None:
+            if orjson is not None:
+                try:
+                    f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+                    return
+                except orjson.JSONEncodeError:
+                    pass  # e.g. integers beyond 64 bits; the stdlib encoder handles those
+
+            # The stdlib encoder streams chunks into the buffered writer
+            text = io.TextIOWrapper(f, encoding="utf-8")
+            json.dump(data, text, indent=4, ensure_ascii=False)
+            text.flush()
+            text.detach()
+
+        bytes_written = replace_file(path, write_body, backup)
 
         return {
             "success": True,
             "message": f"JSON successfully written to '{path}'",
             "path": str(path.resolve()),
-            "bytes_written": len(json_str)
+            "bytes_written": bytes_written
         }
 
     except Exception as e:
@@ -84,7 +232,81 @@ def write_json(filepath: str, data: List[Dict[str, Any]], backup: bool = True) -
         }
 
 
-@tool
+def write_json_rows(filepath: str, rows: Iterable[Dict[str, Any]], backup: bool = True) -> dict:
+    """
+    Stream rows into a JSON array file, one row per line, without materializing the full list.
+    Same atomic write, backup, and result format as write_json.
+
+    Args:
+        filepath (str): Path to the output JSON file.
+        rows (Iterable[dict]): Rows to be serialized, consumed lazily.
+        backup (bool): If True, keeps a timestamped backup of the old file (up to YEMUEL_MAX_BACKUPS, default 3, are retained).
+
+    Returns:
+        dict: { "success": bool, "message": str, "path": str, "bytes_written": int }
+    """
+    def dumps(row: Dict[str, Any]) -> bytes:
+        if orjson is not None:
+            try:
+                return orjson.dumps(row)
+            except orjson.JSONEncodeError:
+                pass  # e.g. integers beyond 64 bits; the stdlib encoder handles those
+        return json.dumps(row, ensure_ascii=False).encode("utf-8")
+
+    def write_body(f: BinaryIO) -> None:
+        separator = b"[\n  "
+        for row in rows:
+            f.write(separator)
+            f.write(dumps(row))
+            separator = b",\n  "
+        f.write(b"[]" if separator == b"[\n  " else b"\n]")
+
+    try:
+        path = Path(filepath)
+        bytes_written = replace_file(path, write_body, backup)
+
+        return {
+            "success": True,
+            "message": f"JSON successfully written to '{path}'",
+            "path": str(path.resolve()),
+            "bytes_written": bytes_written
+        }
+
+    except Exception as e:
+        return {
+            "success": False,
+            "message": f"Failed to write JSON to '{filepath}': {str(e)}",
+            "path": filepath
+        }
+
+
+def load_json_file(path: str) -> Any:
+    """Read and parse a JSON file."""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+@functools.lru_cache(maxsize=8)
+def json_file_snapshot(path: str, mtime_ns: int, size: int) -> bytes:
+    """
+    Parse a JSON file once and keep it as an immutable marshal snapshot. Memoized on
+    (path, mtime, size), so any rewrite invalidates the entry automatically.
+    """
+    return marshal.dumps(load_json_file(path))
+
+
+def parse_json_file(path: str, mtime_ns: int, size: int) -> Any:
+    """
+    Parse a JSON file into a fresh object that callers may freely mutate. Files up to
+    READ_CACHE_MAX_BYTES are rebuilt from a cached snapshot instead of being re-read and
+    re-parsed; marshal.loads is as fast as orjson and about 2x faster than the stdlib parser.
+    """
+    if size > READ_CACHE_MAX_BYTES:
+        return load_json_file(path)
+    return marshal.loads(json_file_snapshot(path, mtime_ns, size))
+
+
 def read_json(filepath: str) -> dict:
     """
     Read a JSON file and return its parsed contents.
@@ -97,22 +319,22 @@ def read_json(filepath: str) -> dict:
         dict: { "success": bool, "data": dict | list | None, "message": str }
     """
     path = Path(filepath)
-    if not path.exists():
-        return {
-            "success": False,
-            "data": None,
-            "message": f"File not found: '{filepath}'"
-        }
-
     try:
-        with path.open('r', encoding="utf-8") as f:
-            data = json.load(f)
+        stat = path.stat()
+        data = parse_json_file(str(path.resolve()), stat.st_mtime_ns, stat.st_size)
         return {
             "success": True,
             "data": data,
             "message": f"File '{filepath}' successfully read"
         }
 
+    except FileNotFoundError:
+        return {
+            "success": False,
+            "data": None,
+            "message": f"File not found: '{filepath}'"
+        }
+
     except json.JSONDecodeError as e:
         return {
             "success": False,
@@ -135,6 +357,156 @@ def read_json(filepath: str) -> dict:
         }
 
 
+async def awrite_json(filepath: str, data: List[Dict[str, Any]], backup: bool = True) -> dict:
+    """Async variant of write_json; runs the filesystem work in a worker thread."""
+    return await asyncio.to_thread(write_json, filepath, data, backup)
+
+
+async def aread_json(filepath: str) -> dict:
+    """Async variant of read_json; runs the filesystem work in a worker thread."""
+    return await asyncio.to_thread(read_json, filepath)
+
+
+GENDERS = ("Male", "Female", "Non-binary")
+CITIES = ("New York", "London", "Berlin", "Tokyo", "Lagos", "Toronto", "Paris")
+SIGNUP_SOURCES = ("Web", "Mobile", "API", "Google", "GitHub")
+
+# (message, predicate) pairs checked against generate_sample_data's input shape
+SAMPLE_DATA_CHECKS = (
+    ("first_names list cannot be empty", lambda a: a["first_count"] == 0),
+    ("last_names list cannot be empty", lambda a: a["last_count"] == 0),
+    ("domains list cannot be empty", lambda a: a["domain_count"] == 0),
+    ("min_age cannot be negative", lambda a: a["min_age"] < 0),
+    ("max_age cannot be negative", lambda a: a["max_age"] < 0),
+    ("min_age({min_age}) cannot be greater than max_age({max_age})", lambda a: a["min_age"] > a["max_age"]),
+)
+
+
+@functools.lru_cache(maxsize=128)
+def validate_sample_data_args(first_count: int, last_count: int, domain_count: int, min_age: int, max_age: int) -> str:
+    """
+    Validate generate_sample_data's inputs by shape. Cached, so repeated calls with the
+    same shape skip the checks entirely.
+
+    Returns:
+        str: All validation errors joined by "; ", or "" if the inputs are valid.
+    """
+    args = locals()
+    return "; ".join(message.format(**args) for message, failed in SAMPLE_DATA_CHECKS if failed(args))
+
+
+def generate_columns(
+    first_names: List[str],
+    last_names: List[str],
+    domains: List[str],
+    min_age: int,
+    max_age: int,
+    count: int,
+    include_extra_fields: bool,
+    today: date
+) -> Dict[str, List[Any]]:
+    """
+    Generate sample users column-wise (one list per field), so no per-user dict is built
+    until a caller actually needs rows (see iter_rows).
+
+    Returns:
+        Dict[str, List[Any]]: Field name -> column of `count` values, in output key order.
+    """
+    rng = np.random.default_rng() if np is not None else None
+
+    def draw(low: int, high: int) -> List[int]:
+        """Draw `count` random ints in [low, high], vectorized with numpy when available."""
+        if rng is not None:
+            return rng.integers(low, high + 1, count).tolist()
+        randint = random.randint  # local alias: LOAD_FAST instead of a global/attribute lookup per pick
+        return [randint(low, high) for _ in range(count)]
+
+    # --- Random Draws (bulk, so no per-user random calls) ---
+    first_idx = draw(0, len(first_names) - 1)
+    last_idx = draw(0, len(last_names) - 1)
+    domain_idx = draw(0, len(domains) - 1)
+    today_ord = today.toordinal()
+
+    first_lower = [name.lower() for name in first_names]
+    last_lower = [name.lower() for name in last_names]
+
+    columns = {
+        "id": list(range(1, count + 1)),
+        "firstName": [first_names[fi] for fi in first_idx],
+        "lastName": [last_names[li] for li in last_idx],
+        # f-strings compile to a single BUILD_STRING op: measurably faster here than chained + or str.join
+        "username": [
+            f"{first_lower[fi]}{last_lower[li]}{suffix}"
+            for fi, li, suffix in zip(first_idx, last_idx, draw(10, 999))
+        ],
+        "email": [
+            f"{first_lower[fi]}.{last_lower[li]}@{domains[di]}"
+            for fi, li, di in zip(first_idx, last_idx, domain_idx)
+        ],
+        "age": draw(min_age, max_age),
+        "joinedAt": [date.fromordinal(today_ord - d).isoformat() for d in draw(0, 3650)],
+    }
+
+    if include_extra_fields:
+        columns["gender"] = [GENDERS[i] for i in draw(0, len(GENDERS) - 1)]
+        columns["city"] = [CITIES[i] for i in draw(0, len(CITIES) - 1)]
+        columns["signupSource"] = [SIGNUP_SOURCES[i] for i in draw(0, len(SIGNUP_SOURCES) - 1)]
+        columns["phone"] = [
+            f"+{cc} {n[0:3]} {n[3:6]} {n[6:9]} {n[9]}"
+            for cc, n in zip(draw(1, 999), map(str, draw(1000000000, 9999999999)))
+        ]
+        columns["isActive"] = [bool(a) for a in draw(0, 1)]
+
+    return columns
+
+
+def build_rows(columns: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """
+    Turn generate_columns output into the full list of user dicts. Each row is one complete
+    dict literal, which is faster than the generic dict(zip(...)) in iter_rows.
+    """
+    if "gender" not in columns:
+        return [
+            {
+                "id": user_id,
+                "firstName": first,
+                "lastName": last,
+                "username": username,
+                "email": email,
+                "age": age,
+                "joinedAt": joined_at,
+            }
+            for user_id, first, last, username, email, age, joined_at in zip(*columns.values())
+        ]
+    return [
+        {
+            "id": user_id,
+            "firstName": first,
+            "lastName": last,
+            "username": username,
+            "email": email,
+            "age": age,
+            "joinedAt": joined_at,
+            "gender": gender,
+            "city": city,
+            "signupSource": signup_source,
+            "phone": phone,
+            "isActive": is_active,
+        }
+        for (
+            user_id, first, last, username, email, age, joined_at,
+            gender, city, signup_source, phone, is_active,
+        ) in zip(*columns.values())
+    ]
+
+
+def iter_rows(columns: Dict[str, List[Any]]) -> Iterator[Dict[str, Any]]:
+    """Lazily turn generate_columns output into one dict per user (for streaming writes)."""
+    keys = tuple(columns)
+    for row in zip(*columns.values()):
+        yield dict(zip(keys, row))
+
+
 @tool
 def generate_sample_data(
     first_names: List[str],
@@ -143,7 +515,8 @@ def generate_sample_data(
     min_age: int,
     max_age: int,
     count: int = None,
-    include_extra_fields: bool = True
+    include_extra_fields: bool = True,
+    save_to: Optional[str] = None
 ) -> dict:
     """
     Generate realistic sample user data for applications, databases, or tests.
@@ -158,80 +531,72 @@ def generate_sample_data(
         count (int, optional): Number of users to generate. Defaults to len(first_names).
         include_extra_fields (bool, optional): Whether to include additional fields
             like gender, city, phone, and signupSource.
+        save_to (str, optional): If given, the users are streamed straight to this JSON file
+            (with a backup of any existing file) instead of being returned.
 
     Returns:
         dict: A dictionary containing:
-            - "users": List of generated user dictionaries.
+            - "users": List of generated user dictionaries (omitted when `save_to` is given).
             - "count": Number of users generated.
             - "timestamp": Generation time.
+            - "saved": The write result, as returned by write_json (only when `save_to` is given).
     """
 
     # --- Input Validation ---
-    errors = []
-    if not first_names:
-        errors.append("first_names list cannot be empty")
-    if not last_names:
-        errors.append("last_names list cannot be empty")
-    if not domains:
-        errors.append("domains list cannot be empty")
-    if min_age < 0:
-        errors.append("min_age cannot be negative")
-    if max_age < 0:
-        errors.append("max_age cannot be negative")
-    if min_age > max_age:
-        errors.append(f"min_age({min_age}) cannot be greater than max_age({max_age})")
-
+    errors = validate_sample_data_args(len(first_names), len(last_names), len(domains), min_age, max_age)
     if errors:
-        return {"error": "; ".join(errors)}
-
-    # --- Setup ---
-    sample_data = []
-    count = count or len(first_names)
-    genders = ["Male", "Female", "Non-binary"]
-    cities = ["New York", "London", "Berlin", "Tokyo", "Lagos", "Toronto", "Paris"]
-    signup_sources = ["Web", "Mobile", "API", "Google", "GitHub"]
+        return {"error": errors}
 
     # --- User Generation ---
-    for i in range(count):
-        first = random.choice(first_names)
-        last = random.choice(last_names)
-        age = random.randint(min_age, max_age)
-        domain = random.choice(domains)
-        email = f"{first.lower()}.{last.lower()}@{domain}"
-        username = f"{first.lower()}{last.lower()}{random.randint(10, 999)}"
-
-        user = {
-            "id": i + 1,
-            "firstName": first,
-            "lastName": last,
-            "username": username,
-            "email": email,
-            "age": age,
-            "joinedAt": (datetime.now() - timedelta(days=random.randint(0, 3650))).strftime("%Y-%m-%d"),
-        }
-
-        if include_extra_fields:
-            user.update({
-                "gender": random.choice(genders),
-                "city": random.choice(cities),
-                "signupSource": random.choice(signup_sources),
-                "phone": f"+{random.randint(1, 999)} { ' '.join(str(random.randint(1000000000, 9999999999))[i:i+3] for i in range(0, 10, 3)) }",
-                "isActive": random.choice([True, False])
-            })
-
-        sample_data.append(user)
+    count = max(count or len(first_names), 0)  # a negative count yields no users
+    now = datetime.now()
+    columns = generate_columns(
+        first_names, last_names, domains, min_age, max_age, count, include_extra_fields, now.date()
+    )
+    timestamp = now.isoformat(" ", "seconds")
 
     # --- Return Structured Output ---
+    if save_to:
+        return {
+            "count": count,
+            "timestamp": timestamp,
+            "saved": write_json_rows(save_to, iter_rows(columns))
+        }
+
+    sample_data = build_rows(columns)
     return {
         "users": sample_data,
         "count": len(sample_data),
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        "timestamp": timestamp
     }
 
 
-TOOLS  = [write_json, read_json, generate_sample_data]
+TOOLS  = [
+    StructuredTool.from_function(func=write_json, coroutine=awrite_json),
+    StructuredTool.from_function(func=read_json, coroutine=aread_json),
+    generate_sample_data,
+]
 
-llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0)
+class CachedToolsChatGoogleGenerativeAI(ChatGoogleGenerativeAI):
+    """
+    ChatGoogleGenerativeAI that memoizes bind_tools. The agent re-binds the same static tools
+    on every model call, so each tool's schema is otherwise re-introspected and converted
+    to a Gemini function declaration per step.
+    """
+    _bound_tools: Dict[Any, Any] = PrivateAttr(default_factory=dict)
+
+    def bind_tools(self, tools, **kwargs):
+        # Keyed on tool identity; the cached entry keeps the tools alive so ids stay unique
+        key = (tuple(id(t) for t in tools), repr(sorted(kwargs.items())))
+        if key not in self._bound_tools:
+            self._bound_tools[key] = (tuple(tools), super().bind_tools(tools, **kwargs))
+        return self._bound_tools[key][1]
+
+
+# One shared client for the whole process: its gRPC channel (a single multiplexed HTTP/2
+# connection) is reused across calls, and the async channel stays bound to the one
+# background event loop that runs the agent, so requests never pay connection setup again.
+llm = CachedToolsChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0)
 
 SYSTEM_MESSAGE = (
     "You are Yemuelgen — a precise, proactive assistant specialized in generating, managing, "
@@ -244,11 +609,15 @@ SYSTEM_MESSAGE = (
     "You may assume that the number of users to generate equals the length of the first_names list. "
     "The tool returns a dictionary containing generated users and their count. "
 
-    "When a user asks to save or export data, always follow this sequence: "
-    "1) Generate the user data using 'generate_sample_data'. "
-    "2) Immediately call 'write_json' to persist the generated data to the specified file path. "
+    "When a user asks to save or export newly generated data, pass the file path as 'save_to' to "
+    "'generate_sample_data' so the users are written directly without being returned to you. "
+    "To save data you already have, call 'write_json' with that data and the specified file path. "
     "Confirm completion with a concise message summarizing the operation. "
 
+    "When a request involves several independent operations (e.g., generating or saving multiple datasets), "
+    "issue all of their tool calls together in a single step so they run concurrently. "
+    "Only sequence tool calls when one needs another's output, such as 'write_json' saving data returned by an earlier call. "
+
     "If the user refers to 'those users', 'previous users', or similar ambiguous terms, "
     "politely ask them to re-specify the details (names, domains, age range, or file path) before continuing. "
 
@@ -272,12 +641,35 @@ agent = create_agent(
 
 # agent_executor = AgentExecutor(agent=agent, tools=TOOLS, verbose=True)
 
-def run_agent(
+def message_text(content: Any) -> str:
+    """Flatten message content to plain text (Gemini may return a list of structured parts)."""
+    if isinstance(content, list):
+        return " ".join(
+            [
+                part.get("text", str(part)) if isinstance(part, dict) else str(part)
+                for part in content
+            ]
+        )
+    return content
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Whether the error, or one it was raised from, is in TRANSIENT_ERRORS and worth retrying."""
+    while error is not None:
+        if isinstance(error, TRANSIENT_ERRORS):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+async def run_agent(
     user_input: str,
     chat_history: Optional[List[BaseMessage]] = None,
     recursion_limit: int = 50,
     retry_attempts: int = 2,
-    log_exceptions: bool = True
+    log_exceptions: bool = True,
+    on_token: Optional[Callable[[str], None]] = None,
+    on_discard: Optional[Callable[[], None]] = None
 ) -> AIMessage:
     """
     Run a single-turn agent execution with full error handling, retries, and conversation continuity.
@@ -286,48 +678,96 @@ def run_agent(
         user_input (str): The user's message or command to the agent.
         chat_history (List[BaseMessage], optional): The current conversation context.
         recursion_limit (int): Depth limit for the agent's internal reasoning or tool execution.
-        retry_attempts (int): How many times to retry in case of transient errors.
-        log_exceptions (bool): Whether to log detailed traceback info for debugging.
+        retry_attempts (int): How many attempts to make in total, with exponential backoff in between.
+            Only transient errors (see TRANSIENT_ERRORS) are retried.
+        log_exceptions (bool): Whether to log attempt outcomes (tracebacks at DEBUG level).
+        on_token (Callable[[str], None], optional): If given, the reply is streamed and each
+            text chunk is passed to it as soon as it arrives. A run that fails after streaming
+            has started is not retried, so the reply is never streamed twice.
+        on_discard (Callable[[], None], optional): Called when text already passed to on_token
+            came from a model turn that went on to call tools. That text is not part of the
+            final reply, so the consumer should drop everything streamed since the last discard.
 
     Returns:
         AIMessage: The final message produced by the agent (even if an error occurred).
     """
     chat_history = chat_history or []
+    inputs = {"messages": chat_history + [HumanMessage(content=user_input)]}
+    config = {"recursion_limit": recursion_limit}
+
+    # Once part of a reply has been streamed it can't be taken back, so only retry before that
+    streamed = False
+
+    # Exponential backoff with jitter between attempts (rate limits, transient errors)
+    retrying = AsyncRetrying(
+        stop=stop_after_attempt(retry_attempts),
+        wait=wait_exponential_jitter(initial=0.5, max=8),
+        retry=retry_if_exception(lambda e: not streamed and is_transient_error(e)),
+        reraise=True,
+    )
 
-    for attempt in range(1, retry_attempts + 1):
-        try:
-            start_time = time.time()
-
-            result = agent.invoke(
-                {"messages": chat_history + [HumanMessage(content=user_input)]},
-                recursion_limit=50
-            )
-
-
-            duration = round(time.time() - start_time, 2)
-            ai_message = result.get("messages", [])[-1] if "messages" in result else None
-
-            if not ai_message or not isinstance(ai_message, AIMessage):
-                raise ValueError("Agent did not return a valid AIMessage object.")
-
-            # Optional runtime logging
-            if log_exceptions:
-                print(f"[run_agent] ✅ Success in {duration}s (attempt {attempt})")
-
-            return ai_message
-
-        except Exception as e:
-            if log_exceptions:
-                print(f"[run_agent] ⚠️ Error during agent execution (attempt {attempt}): {str(e)}")
-                traceback.print_exc()
-
-            # Last attempt → return safe error message
-            if attempt == retry_attempts:
-                return AIMessage(
-                    content=f"⚠️ Oops — something went wrong while processing your request.\n\nError: {str(e)}"
-                )
+    try:
+        async for attempt_state in retrying:
+            with attempt_state:
+                attempt = attempt_state.retry_state.attempt_number
+                try:
+                    start_time = time.time()
+
+                    if on_token is None:
+                        result = await agent.ainvoke(inputs, config=config)
+                    else:
+                        # "messages" yields model tokens as they arrive, "values" the full agent state
+                        result = {}
+                        tool_step = None
+                        async for mode, data in agent.astream(inputs, config=config, stream_mode=["messages", "values"]):
+                            if mode == "values":
+                                result = data
+                                continue
+                            chunk, metadata = data
+                            if not isinstance(chunk, AIMessageChunk):
+                                continue
+                            step = metadata.get("langgraph_step")
+                            if chunk.tool_call_chunks:
+                                # This turn's text was a preamble to a tool call, not the final reply
+                                tool_step = step
+                                if streamed and on_discard is not None:
+                                    on_discard()
+                                    streamed = False
+                                continue
+                            if tool_step is not None and step == tool_step:
+                                continue
+                            text = message_text(chunk.content)
+                            if text:
+                                streamed = True
+                                on_token(text)
+
+                    duration = round(time.time() - start_time, 2)
+                    ai_message = result.get("messages", [])[-1] if "messages" in result else None
+
+                    if not ai_message or not isinstance(ai_message, AIMessage):
+                        raise ValueError("Agent did not return a valid AIMessage object.")
+
+                except Exception as e:
+                    if log_exceptions:
+                        logger.warning("Error during agent execution (attempt %d): %s", attempt, e)
+                        # Traceback is only formatted if a DEBUG handler will actually consume it
+                        logger.debug("run_agent attempt %d failed", attempt, exc_info=True)
+                    raise
+
+                # Optional runtime logging
+                if log_exceptions:
+                    logger.info("Success in %ss (attempt %d)", duration, attempt)
+
+                return ai_message
 
-            time.sleep(1.5)  # Small delay before retry (for rate-limits or transient issues)
+    except Exception as e:
+        # Out of attempts → return safe error message
+        error_message = AIMessage(
+            content=f"⚠️ Oops — something went wrong while processing your request.\n\nError: {str(e)}"
+        )
+        if on_token is not None:
+            on_token(f"\n{error_message.content}")  # own line, after any partially streamed reply
+        return error_message
 
     # Should never hit this, but for absolute safety:
     return AIMessage(content="Unknown execution error — no output produced.")
@@ -350,6 +790,7 @@ def run_agent(
 #     print("=" * 70)
 
 #     chat_history: List[BaseMessage] = []
+#     loop = asyncio.new_event_loop()  # reused across turns so the LLM's async channel stays open
 
 #     while True:
 #         try:
@@ -364,7 +805,7 @@ def run_agent(
 #             print(f"{Fore.YELLOW}Yemuelgen is processing your request... \n{Style.RESET_ALL}", end="", flush=True)
 #             start_time = time.time()
 
-#             ai_response = run_agent(user_input, chat_history=chat_history)
+#             ai_response = loop.run_until_complete(run_agent(user_input, chat_history=chat_history))
 #             duration = round(time.time() - start_time, 2)
 
 #             # Append chat history
@@ -392,48 +833,122 @@ def run_agent(
 #             break
 #         except Exception as e:
 #             print(f"\n{Fore.RED}💥 Unexpected error: {e}{Style.RESET_ALL}")
-#             if hasattr(e, '__traceback__'):
-#                 import traceback
-#                 traceback.print_exc()
+#             logger.exception("Unexpected error in interactive console")
 #             continue
 
-def run_yemuelgen_agent(user_input, chat_history, output_box):
-    """Run agent, display user and AI messages in GUI."""
-    try:
-        output_box.insert(tk.END, f"\nYou: {user_input}\n", "user")
-        output_box.insert(tk.END, "Yemuelgen is processing your request...\n", "status")
-        output_box.see(tk.END)
-        output_box.update_idletasks()
+def start_event_loop() -> asyncio.AbstractEventLoop:
+    """Start an asyncio event loop on a daemon thread, so agent runs never block the Tk main loop."""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+
+def run_yemuelgen_agent(user_input, chat_history, output_box, loop) -> Future:
+    """
+    Submit the agent run to the background event loop and stream user and AI messages into GUI.
+    Returns the run's future, which can be cancelled to abort the request.
+    """
+    output_box.insert(tk.END, f"\nYou: {user_input}\n", "user")
+    output_box.insert(tk.END, "Yemuelgen is processing your request...\n", "status")
+    output_box.see(tk.END)
+
+    start_time = time.time()
+    reply = {"streamed": False, "pending": [], "flush_scheduled": False}
+    # Both callbacks fire on the event-loop thread; hand the work back to the Tk main thread
+    future = asyncio.run_coroutine_threadsafe(
+        run_agent(
+            user_input,
+            chat_history=list(chat_history),
+            on_token=lambda text: output_box.after(0, queue_agent_token, text, output_box, reply),
+            on_discard=lambda: output_box.after(0, discard_agent_tokens, output_box, reply),
+        ),
+        loop,
+    )
+    future.add_done_callback(
+        lambda fut: output_box.after(
+            0, show_agent_result, fut, user_input, chat_history, output_box, start_time, reply
+        )
+    )
+    return future
 
-        start_time = time.time()
-        ai_response = run_agent(user_input, chat_history=chat_history)
+
+def queue_agent_token(text, output_box, reply):
+    """
+    Buffer a streamed chunk of the AI reply and schedule a single flush for the batch.
+    Must be called on the Tk main thread.
+    """
+    reply["pending"].append(text)
+    if not reply["flush_scheduled"]:
+        reply["flush_scheduled"] = True
+        output_box.after(STREAM_FLUSH_MS, flush_agent_tokens, output_box, reply)
+
+
+def flush_agent_tokens(output_box, reply):
+    """Insert all buffered chunks of the AI reply into GUI at once. Must be called on the Tk main thread."""
+    reply["flush_scheduled"] = False
+    if not reply["pending"]:
+        return
+    text = "".join(reply["pending"])
+    reply["pending"].clear()
+
+    if not reply["streamed"]:
+        reply["streamed"] = True
+        # Remember where the reply starts so a discarded tool-call preamble can be removed
+        output_box.mark_set("reply_start", "end-1c")
+        output_box.mark_gravity("reply_start", tk.LEFT)
+        output_box.insert(tk.END, "Yemuelgen: ", "ai")
+        text = text.lstrip()
+    output_box.insert(tk.END, text, "ai")
+    trim_output(output_box)
+    output_box.see(tk.END)
+
+
+def discard_agent_tokens(output_box, reply):
+    """
+    Remove the AI text streamed so far, buffered or already shown, because it belonged
+    to a tool-calling turn rather than the final reply. Must be called on the Tk main thread.
+    """
+    reply["pending"].clear()
+    if reply["streamed"]:
+        reply["streamed"] = False
+        output_box.delete("reply_start", "end-1c")
+
+
+def trim_output(output_box, max_lines=MAX_OUTPUT_LINES):
+    """Drop the oldest lines of GUI output so the Text widget stays cheap to redraw."""
+    lines = int(output_box.index("end-1c").split(".")[0])
+    if lines > max_lines:
+        output_box.delete("1.0", f"{lines - max_lines + TRIM_CHUNK_LINES}.0")
+
+
+def show_agent_result(future, user_input, chat_history, output_box, start_time, reply):
+    """Finish the AI reply in GUI once the agent run is done. Must be called on the Tk main thread."""
+    flush_agent_tokens(output_box, reply)  # don't wait for the scheduled flush to land first
+    try:
+        ai_response = future.result()
         duration = round(time.time() - start_time, 2)
 
         chat_history.append(HumanMessage(content=user_input))
         chat_history.append(ai_response)
 
-        content = ai_response.content
-        if isinstance(content, list):
-            # Gemini may return structured text
-            content = " ".join(
-                [
-                    part.get("text", str(part)) if isinstance(part, dict) else str(part)
-                    for part in content
-                ]
-            )
+        if reply["streamed"]:
+            footer = f"\n[Completed in {duration}s]\n"
+        else:
+            content = message_text(ai_response.content)
+            footer = f"Yemuelgen: {content.strip()}\n[Completed in {duration}s]\n"
+        output_box.insert(tk.END, footer, "ai")
 
-        output_box.insert(
-            tk.END,
-            f"Yemuelgen: {content.strip()}\n[Completed in {duration}s]\n",
-            "ai",
-        )
-        output_box.see(tk.END)
+    except CancelledError:
+        output_box.insert(tk.END, "\nRequest cancelled.\n", "status")
 
     except Exception as e:
+        logger.exception("Unexpected error while running the agent")
         output_box.insert(
             tk.END, f"\n💥 Unexpected error: {str(e)}\n", "error"
         )
-        output_box.see(tk.END)
+
+    trim_output(output_box)
+    output_box.see(tk.END)
 
 
 def start_gui():
@@ -477,17 +992,35 @@ def start_gui():
     user_input.pack(side=tk.LEFT, padx=5)
 
     chat_history: List[BaseMessage] = []
+    loop = start_event_loop()
+    in_flight: Optional[Future] = None
+
+    def on_done():
+        nonlocal in_flight
+        in_flight = None
+        send_button.config(state=tk.NORMAL)
+        cancel_button.config(state=tk.DISABLED)
 
     def on_send():
+        nonlocal in_flight
+        if in_flight is not None:
+            return
         text = user_input.get("1.0", tk.END).strip()
         if not text:
             return
         if text.lower() in {"exit", "quit"}:
             root.destroy()
             return
-        run_yemuelgen_agent(text, chat_history, output_box)
+        in_flight = run_yemuelgen_agent(text, chat_history, output_box, loop)
+        in_flight.add_done_callback(lambda _: root.after(0, on_done))
+        send_button.config(state=tk.DISABLED)
+        cancel_button.config(state=tk.NORMAL)
         user_input.delete("1.0", tk.END)
 
+    def on_cancel():
+        if in_flight is not None:
+            in_flight.cancel()
+
 
     send_button = tk.Button(
         frame,
@@ -502,6 +1035,20 @@ def start_gui():
     )
     send_button.pack(side=tk.LEFT)
 
+    cancel_button = tk.Button(
+        frame,
+        text="Cancel",
+        width=10,
+        command=on_cancel,
+        state=tk.DISABLED,
+        bg="#6272a4",
+        fg="white",
+        font=("Arial", 11, "bold"),
+        relief="flat",
+        cursor="hand2",
+    )
+    cancel_button.pack(side=tk.LEFT, padx=5)
+
     quit_button = tk.Button(
         root,
         text="Quit",